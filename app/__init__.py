@@ -2,12 +2,16 @@
 import os
 from flask import Flask
 from flask_login import LoginManager
+from werkzeug.middleware.proxy_fix import ProxyFix
 from app.config import config
+from app.utils.rate_limit import RateLimiter
 
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
 login_manager.login_message = 'Please log in to access this page.'
 
+rate_limiter = RateLimiter()
+
 def create_app(config_name=None):
     """Create and configure the Flask application."""
     if config_name is None:
@@ -22,12 +26,26 @@ def create_app(config_name=None):
     except OSError:
         pass
     
+    # Trust client addresses forwarded by the reverse proxy
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(
+            app.wsgi_app,
+            x_for=app.config['PROXY_FIX_X_FOR'],
+            x_proto=app.config['PROXY_FIX_X_FOR']
+        )
+    
     # Initialize extensions
     login_manager.init_app(app)
+    rate_limiter.init_app(app)
     
     # Initialize database
     from app.models import database
-    database.init_db(app.config['DATABASE_PATH'])
+    database.init_db(
+        app.config['DATABASE_PATH'],
+        write_transaction=app.config['DATABASE_WRITE_TRANSACTION'],
+        busy_timeout=app.config['DATABASE_BUSY_TIMEOUT'],
+        tombstone_retention_days=app.config['SYNC_TOMBSTONE_RETENTION_DAYS']
+    )
     
     # User loader for Flask-Login
     @login_manager.user_loader
@@ -36,10 +54,11 @@ def create_app(config_name=None):
         return User.get_by_id(int(user_id))
     
     # Register blueprints
-    from app.routes import auth, main, transactions
+    from app.routes import api, auth, main, transactions
     app.register_blueprint(auth.bp)
     app.register_blueprint(main.bp)
     app.register_blueprint(transactions.bp)
+    app.register_blueprint(api.bp)
     
     # Register error handlers
     from app.routes import errors
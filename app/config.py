@@ -12,6 +12,12 @@ class Config:
     DATABASE_NAME = os.environ.get('DATABASE_NAME')
     INSTANCE_PATH = BASE_DIR / 'instance'
     DATABASE_PATH = INSTANCE_PATH / DATABASE_NAME
+    DATABASE_WRITE_TRANSACTION = 'IMMEDIATE'  # or 'DEFERRED'
+    DATABASE_BUSY_TIMEOUT = 5.0  # seconds
+    
+    # Number of reverse proxies in front of the app; when set, client
+    # addresses are read from X-Forwarded-For
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 0))
     
     # Session configuration
     SESSION_COOKIE_HTTPONLY = True
@@ -20,6 +26,38 @@ class Config:
     
     # Pagination
     TRANSACTIONS_PER_PAGE = 10
+    
+    # JSON API
+    API_MAX_PER_PAGE = 100
+    API_BATCH_MAX_OPERATIONS = 500
+    API_SYNC_LIMIT = 500
+    SYNC_TOMBSTONE_RETENTION_DAYS = 90  # None keeps delete markers forever
+    
+    # Rate limiting, keyed by endpoint or blueprint name and optionally
+    # prefixed with an HTTP method
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMITS = {
+        'POST auth.login': '10/minute',
+        'POST auth.register': '5/minute',
+        'transactions.list_transactions': '60/minute',
+        'api': '300/minute'
+    }
+    RATE_LIMIT_MAX_BUCKETS = 10000
+    RATE_LIMIT_LOG_INTERVAL = 60  # seconds between rejection log lines
+    RATE_LIMIT_STATS_URL = '/_stats/rate-limit'
+    RATE_LIMIT_STATS_TOKEN = os.environ.get('RATE_LIMIT_STATS_TOKEN')  # unset disables
+    
+    # Load shedding for expensive endpoints
+    LOAD_SHED_ENDPOINTS = (
+        'POST auth.login',
+        'POST auth.register',
+        'transactions.list_transactions',
+        'api'
+    )
+    LOAD_SHED_MAX_IN_FLIGHT = 8  # per process; matches gthread --threads 8
+    LOAD_SHED_QUEUE_THRESHOLD = 1.0  # seconds waited, from X-Request-Start
+    LOAD_SHED_LATENCY_THRESHOLD = 2.0  # seconds, moving average
+    LOAD_SHED_LATENCY_ALPHA = 0.1
 
 class DevelopmentConfig(Config):
     """Development configuration."""
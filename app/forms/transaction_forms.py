@@ -1,8 +1,13 @@
 """Transaction forms."""
 from flask_wtf import FlaskForm
 from wtforms import StringField, DecimalField, SelectField, DateField, SubmitField
-from wtforms.validators import DataRequired, NumberRange, Length  
+from wtforms.validators import DataRequired, NumberRange, Length, ValidationError
 from datetime import date
+from decimal import Decimal
+
+# Largest accepted amount; keeps per-user totals well inside SQLite's
+# 64-bit INTEGER range when stored as cents
+MAX_AMOUNT = Decimal('999999999.99')
 
 CATEGORIES = [
     ('salary', 'Salary'),
@@ -27,7 +32,8 @@ class TransactionForm(FlaskForm):
     ])
     amount = DecimalField('Amount', validators=[
         DataRequired(),
-        NumberRange(min=0.01, message='Amount must be greater than 0')
+        NumberRange(min=0.01, max=MAX_AMOUNT,
+                    message=f'Amount must be between 0.01 and {MAX_AMOUNT}')
     ], places=2)
     transaction_type = SelectField('Type', choices=[
         ('income', 'Income'),
@@ -36,6 +42,13 @@ class TransactionForm(FlaskForm):
     category = SelectField('Category', choices=CATEGORIES, validators=[DataRequired()])
     date = DateField('Date', validators=[DataRequired()], default=date.today)
     submit = SubmitField('Save Transaction')
+    
+    def validate_amount(self, amount):
+        """Reject amounts with more than two decimal places instead of rounding."""
+        if amount.errors or amount.data is None:
+            return
+        if amount.data.normalize().as_tuple().exponent < -2:
+            raise ValidationError('Amount can have at most 2 decimal places.')
 
 class FilterForm(FlaskForm):
     """Form for filtering transactions."""
@@ -2,17 +2,34 @@
 import sqlite3
 from contextlib import contextmanager
 from pathlib import Path
+from flask import has_request_context, request
 
 _db_path = None
+_write_transaction = 'IMMEDIATE'
+_busy_timeout = 5.0
 
-def init_db(db_path):
-    """Initialize the database with tables."""
-    global _db_path
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+def init_db(db_path, write_transaction='IMMEDIATE', busy_timeout=5.0,
+            tombstone_retention_days=90):
+    """Initialize the database with tables.
+    
+    ``write_transaction`` is ``'IMMEDIATE'`` or ``'DEFERRED'`` and controls
+    how write transactions begin; see ``get_connection``. Sync delete
+    markers older than ``tombstone_retention_days`` are pruned (None keeps
+    them forever); see ``prune_change_log``.
+    """
+    global _db_path, _write_transaction, _busy_timeout
     _db_path = Path(db_path)
+    _write_transaction = write_transaction
+    _busy_timeout = busy_timeout
     
     conn = get_connection()
     cursor = conn.cursor()
     
+    # WAL lets readers run alongside a writer instead of waiting for it
+    cursor.execute('PRAGMA journal_mode = WAL')
+    
     # Users table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -31,6 +48,7 @@ def init_db(db_path):
             user_id INTEGER NOT NULL,
             description TEXT NOT NULL,
             amount REAL NOT NULL,
+            amount_cents INTEGER,
             transaction_type TEXT NOT NULL,
             category TEXT NOT NULL,
             date DATE NOT NULL,
@@ -50,20 +68,249 @@ def init_db(db_path):
         ON transactions (date)
     ''')
     
+    # Change log for delta sync: one row per transaction holding the
+    # sequence number of its latest insert, update or delete. It is set up
+    # under one write lock so concurrent workers agree on whether it is new.
+    conn.execute('BEGIN IMMEDIATE')
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transaction_changes'"
+    )
+    new_change_log = cursor.fetchone() is None
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS transaction_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            transaction_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            operation TEXT NOT NULL,
+            changed_at TIMESTAMP
+        )
+    ''')
+    
+    columns = [row['name'] for row in cursor.execute('PRAGMA table_info(transaction_changes)')]
+    if 'changed_at' not in columns:
+        cursor.execute('ALTER TABLE transaction_changes ADD COLUMN changed_at TIMESTAMP')
+        cursor.execute('UPDATE transaction_changes SET changed_at = CURRENT_TIMESTAMP')
+    
+    # Highest sequence number whose delete marker has been pruned
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            pruned_seq INTEGER NOT NULL DEFAULT 0,
+            pruned_at TIMESTAMP
+        )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO change_log_state (id) VALUES (1)')
+    
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transaction_changes_user_seq 
+        ON transaction_changes (user_id, seq)
+    ''')
+    
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transaction_changes_transaction_id 
+        ON transaction_changes (transaction_id)
+    ''')
+    
+    # Updates are only logged for client-visible columns, so backfills of
+    # derived columns such as amount_cents do not resend every row. The
+    # triggers are replaced rather than created if missing so databases
+    # made with older definitions pick up the current ones.
+    for name, event, row, operation in (
+        ('insert', 'INSERT', 'NEW', 'upsert'),
+        ('update', 'UPDATE OF description, amount, transaction_type, category, date',
+         'NEW', 'upsert'),
+        ('delete', 'DELETE', 'OLD', 'delete')
+    ):
+        cursor.execute(f'DROP TRIGGER IF EXISTS trg_transactions_{name}')
+        cursor.execute(f'''
+            CREATE TRIGGER trg_transactions_{name}
+            AFTER {event} ON transactions
+            BEGIN
+                DELETE FROM transaction_changes WHERE transaction_id = {row}.id;
+                INSERT INTO transaction_changes
+                    (transaction_id, user_id, operation, changed_at)
+                VALUES ({row}.id, {row}.user_id, '{operation}', CURRENT_TIMESTAMP);
+            END
+        ''')
+    
+    # Rows that predate the change log are logged once, when it is created
+    if new_change_log:
+        cursor.execute('''
+            INSERT INTO transaction_changes (transaction_id, user_id, operation, changed_at)
+            SELECT id, user_id, 'upsert', CURRENT_TIMESTAMP FROM transactions
+            ORDER BY id
+        ''')
+    conn.commit()
+    
+    if tombstone_retention_days:
+        prune_change_log(conn, tombstone_retention_days)
+    
+    migrate_amount_cents(conn)
+    
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_user_type_cents 
+        ON transactions (user_id, transaction_type, amount_cents)
+    ''')
+    
     conn.commit()
     conn.close()
 
+def prune_change_log(conn, retention_days):
+    """Drop sync delete markers older than ``retention_days``.
+    
+    Runs at most once a day however many workers start. The highest pruned
+    sequence number is kept in ``change_log_state`` so clients syncing from
+    an older watermark can be told to resync from scratch.
+    """
+    cursor = conn.cursor()
+    conn.execute('BEGIN IMMEDIATE')
+    
+    cursor.execute(
+        '''SELECT 1 FROM change_log_state
+           WHERE pruned_at IS NULL OR pruned_at < datetime('now', '-1 day')'''
+    )
+    if cursor.fetchone() is not None:
+        cutoff = f'-{int(retention_days)} days'
+        cursor.execute(
+            '''SELECT MAX(seq) FROM transaction_changes
+               WHERE operation = 'delete' AND changed_at < datetime('now', ?)''',
+            (cutoff,)
+        )
+        pruned_seq = cursor.fetchone()[0]
+        if pruned_seq is not None:
+            cursor.execute(
+                '''DELETE FROM transaction_changes
+                   WHERE operation = 'delete' AND changed_at < datetime('now', ?)''',
+                (cutoff,)
+            )
+            cursor.execute(
+                'UPDATE change_log_state SET pruned_seq = MAX(pruned_seq, ?)',
+                (pruned_seq,)
+            )
+        cursor.execute('UPDATE change_log_state SET pruned_at = CURRENT_TIMESTAMP')
+    
+    conn.commit()
+
+def migrate_amount_cents(conn, batch_size=1000):
+    """Move transaction amounts from REAL dollars to INTEGER cents.
+    
+    Adds the ``amount_cents`` column if needed and backfills it in small
+    committed batches so other connections are never locked out for long.
+    The legacy ``amount`` column is still written so older code can run
+    alongside; triggers keep ``amount_cents`` in sync for its writes.
+    """
+    cursor = conn.cursor()
+    
+    # Check and alter under one write lock so workers starting together
+    # cannot both try to add the column
+    conn.execute('BEGIN IMMEDIATE')
+    columns = [row['name'] for row in cursor.execute('PRAGMA table_info(transactions)')]
+    if 'amount_cents' not in columns:
+        cursor.execute('ALTER TABLE transactions ADD COLUMN amount_cents INTEGER')
+    conn.commit()
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_amount_cents_insert
+        AFTER INSERT ON transactions
+        WHEN NEW.amount_cents IS NULL
+        BEGIN
+            UPDATE transactions SET amount_cents = CAST(ROUND(NEW.amount * 100) AS INTEGER)
+            WHERE id = NEW.id;
+        END
+    ''')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_amount_cents_update
+        AFTER UPDATE OF amount ON transactions
+        WHEN NEW.amount IS NOT OLD.amount AND NEW.amount_cents IS OLD.amount_cents
+        BEGIN
+            UPDATE transactions SET amount_cents = CAST(ROUND(NEW.amount * 100) AS INTEGER)
+            WHERE id = NEW.id;
+        END
+    ''')
+    conn.commit()
+    
+    # Walk the primary key in ranges so each batch is an index seek
+    cursor.execute('SELECT MIN(id) FROM transactions WHERE amount_cents IS NULL')
+    start = cursor.fetchone()[0]
+    while start is not None:
+        cursor.execute(
+            '''UPDATE transactions
+               SET amount_cents = CAST(ROUND(amount * 100) AS INTEGER)
+               WHERE id >= ? AND id < ? AND amount_cents IS NULL''',
+            (start, start + batch_size)
+        )
+        conn.commit()
+        cursor.execute('SELECT MIN(id) FROM transactions WHERE id >= ?',
+                       (start + batch_size,))
+        start = cursor.fetchone()[0]
+
 def get_connection():
-    """Get a database connection."""
-    conn = sqlite3.connect(_db_path)
+    """Get a read-write database connection.
+    
+    Write transactions begin with ``BEGIN IMMEDIATE`` by default, taking
+    the write lock up front. A deferred transaction that reads first and
+    writes later can fail with SQLITE_BUSY when another writer got there
+    in between, since it cannot upgrade its read lock.
+    """
+    conn = sqlite3.connect(_db_path, timeout=_busy_timeout,
+                           isolation_level=_write_transaction)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def get_read_connection():
+    """Get a read-only database connection.
+    
+    Opened with ``mode=ro`` and ``query_only`` so it can never take the
+    write lock and never blocks or waits on writers under WAL.
+    """
+    conn = sqlite3.connect(f'{_db_path.resolve().as_uri()}?mode=ro', uri=True,
+                           timeout=_busy_timeout)
+    conn.execute('PRAGMA query_only = ON')
     conn.row_factory = sqlite3.Row
     return conn
 
+def _is_read_request():
+    """Check whether the current request is a safe (read-only) method."""
+    return has_request_context() and request.method in READ_METHODS
+
+@contextmanager
+def get_db(conn=None, readonly=None):
+    """Context manager for database connections.
+    
+    When an open connection is passed it is reused and left open, so
+    model methods can take part in a caller's transaction. Otherwise
+    ``readonly`` picks the connection type; when left as None a read-only
+    connection is used for GET requests.
+    """
+    if conn is not None:
+        yield conn
+        return
+    
+    if readonly is None:
+        readonly = _is_read_request()
+    
+    conn = get_read_connection() if readonly else get_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
 @contextmanager
-def get_db():
-    """Context manager for database connections."""
+def atomic():
+    """Context manager that commits on success and rolls back on error.
+    
+    The transaction is opened straight away, so reads made inside it see
+    the same snapshot as its writes.
+    """
     conn = get_connection()
     try:
+        conn.execute(f'BEGIN {_write_transaction}')
         yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     finally:
-        conn.close()
\ No newline at end of file
+        conn.close()
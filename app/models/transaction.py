@@ -1,8 +1,29 @@
 """Transaction model."""
+from decimal import Decimal
 from app.models.database import get_db
 
+CENT = Decimal('0.01')
+
+def to_cents(amount):
+    """Convert a dollar amount (Decimal, str, int or float) to integer cents.
+    
+    Raises ValueError rather than rounding when the amount is not a whole
+    number of cents; callers validate input before it gets here.
+    """
+    cents = Decimal(str(amount)) * 100
+    if not cents.is_finite() or cents != cents.to_integral_value():
+        raise ValueError(f'{amount} is not a whole number of cents')
+    return int(cents)
+
+def from_cents(cents):
+    """Convert integer cents to an exact Decimal dollar amount."""
+    return (Decimal(cents) / 100).quantize(CENT)
+
 class Transaction:
-    """Transaction model for income and expenses."""
+    """Transaction model for income and expenses.
+    
+    Amounts are stored as integer cents and exposed as ``Decimal`` dollars.
+    """
     
     def __init__(self, id, user_id, description, amount, transaction_type, 
                  category, date, created_at=None):
@@ -16,45 +37,70 @@ class Transaction:
         self.created_at = created_at
     
     @staticmethod
-    def create(user_id, description, amount, transaction_type, category, date):
-        """Create a new transaction."""
-        with get_db() as conn:
-            cursor = conn.cursor()
+    def _from_row(row):
+        """Build a transaction from a database row."""
+        return Transaction(
+            id=row['id'],
+            user_id=row['user_id'],
+            description=row['description'],
+            amount=from_cents(row['amount_cents']),
+            transaction_type=row['transaction_type'],
+            category=row['category'],
+            date=row['date'],
+            created_at=row['created_at']
+        )
+    
+    def to_dict(self):
+        """Serialize transaction for JSON responses."""
+        return {
+            'id': self.id,
+            'description': self.description,
+            'amount': str(self.amount),
+            'transaction_type': self.transaction_type,
+            'category': self.category,
+            'date': str(self.date),
+            'created_at': self.created_at
+        }
+    
+    @staticmethod
+    def create(user_id, description, amount, transaction_type, category, date,
+               conn=None):
+        """Create a new transaction.
+        
+        Pass ``conn`` to run inside an open transaction; the caller commits.
+        """
+        with get_db(conn, readonly=False) as db:
+            cursor = db.cursor()
+            cents = to_cents(amount)
             cursor.execute(
                 '''INSERT INTO transactions 
-                   (user_id, description, amount, transaction_type, category, date) 
-                   VALUES (?, ?, ?, ?, ?, ?)''',
-                (user_id, description, amount, transaction_type, category, date)
+                   (user_id, description, amount, amount_cents, transaction_type, 
+                    category, date) 
+                   VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                (user_id, description, cents / 100, cents, transaction_type,
+                 category, date)
             )
-            conn.commit()
-            return Transaction.get_by_id(cursor.lastrowid)
+            if conn is None:
+                db.commit()
+            return Transaction.get_by_id(cursor.lastrowid, conn=db)
     
     @staticmethod
-    def get_by_id(transaction_id):
+    def get_by_id(transaction_id, conn=None):
         """Get transaction by ID."""
-        with get_db() as conn:
+        with get_db(conn, readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM transactions WHERE id = ?', (transaction_id,))
             row = cursor.fetchone()
             
             if row:
-                return Transaction(
-                    id=row['id'],
-                    user_id=row['user_id'],
-                    description=row['description'],
-                    amount=row['amount'],
-                    transaction_type=row['transaction_type'],
-                    category=row['category'],
-                    date=row['date'],
-                    created_at=row['created_at']
-                )
+                return Transaction._from_row(row)
         return None
     
     @staticmethod
     def get_by_user(user_id, limit=None, offset=0, category=None, 
                     start_date=None, end_date=None, order_by='date DESC'):
         """Get transactions for a user with optional filters."""
-        with get_db() as conn:
+        with get_db(readonly=True) as conn:
             cursor = conn.cursor()
             
             query = 'SELECT * FROM transactions WHERE user_id = ?'
@@ -81,21 +127,12 @@ class Transaction:
             cursor.execute(query, params)
             rows = cursor.fetchall()
             
-            return [Transaction(
-                id=row['id'],
-                user_id=row['user_id'],
-                description=row['description'],
-                amount=row['amount'],
-                transaction_type=row['transaction_type'],
-                category=row['category'],
-                date=row['date'],
-                created_at=row['created_at']
-            ) for row in rows]
+            return [Transaction._from_row(row) for row in rows]
     
     @staticmethod
     def count_by_user(user_id, category=None, start_date=None, end_date=None):
         """Count transactions for a user with optional filters."""
-        with get_db() as conn:
+        with get_db(readonly=True) as conn:
             cursor = conn.cursor()
             
             query = 'SELECT COUNT(*) as count FROM transactions WHERE user_id = ?'
@@ -116,53 +153,120 @@ class Transaction:
             cursor.execute(query, params)
             return cursor.fetchone()['count']
     
-    def update(self, description, amount, transaction_type, category, date):
-        """Update transaction."""
-        with get_db() as conn:
-            cursor = conn.cursor()
+    def update(self, description, amount, transaction_type, category, date,
+               conn=None):
+        """Update transaction.
+        
+        Pass ``conn`` to run inside an open transaction; the caller commits.
+        """
+        with get_db(conn, readonly=False) as db:
+            cursor = db.cursor()
+            cents = to_cents(amount)
             cursor.execute(
                 '''UPDATE transactions 
-                   SET description = ?, amount = ?, transaction_type = ?, 
-                       category = ?, date = ?
+                   SET description = ?, amount = ?, amount_cents = ?, 
+                       transaction_type = ?, category = ?, date = ?
                    WHERE id = ?''',
-                (description, amount, transaction_type, category, date, self.id)
+                (description, cents / 100, cents, transaction_type, category,
+                 date, self.id)
             )
-            conn.commit()
+            if conn is None:
+                db.commit()
         
         self.description = description
-        self.amount = amount
+        self.amount = from_cents(cents)
         self.transaction_type = transaction_type
         self.category = category
         self.date = date
     
-    def delete(self):
-        """Delete transaction."""
-        with get_db() as conn:
-            cursor = conn.cursor()
+    def delete(self, conn=None):
+        """Delete transaction.
+        
+        Pass ``conn`` to run inside an open transaction; the caller commits.
+        """
+        with get_db(conn, readonly=False) as db:
+            cursor = db.cursor()
             cursor.execute('DELETE FROM transactions WHERE id = ?', (self.id,))
-            conn.commit()
+            if conn is None:
+                db.commit()
     
     @staticmethod
     def get_summary(user_id):
         """Get income, expense, and balance summary for a user."""
-        with get_db() as conn:
+        with get_db(readonly=True) as conn:
             cursor = conn.cursor()
             
             cursor.execute(
-                '''SELECT 
-                   SUM(CASE WHEN transaction_type = 'income' THEN amount ELSE 0 END) as total_income,
-                   SUM(CASE WHEN transaction_type = 'expense' THEN amount ELSE 0 END) as total_expense
-                   FROM transactions WHERE user_id = ?''',
+                '''SELECT transaction_type, SUM(amount_cents) as total_cents
+                   FROM transactions WHERE user_id = ?
+                   GROUP BY transaction_type''',
                 (user_id,)
             )
-            row = cursor.fetchone()
+            totals = {row['transaction_type']: row['total_cents'] for row in cursor}
             
-            total_income = row['total_income'] or 0
-            total_expense = row['total_expense'] or 0
+            total_income = from_cents(totals.get('income', 0))
+            total_expense = from_cents(totals.get('expense', 0))
             balance = total_income - total_expense
             
             return {
                 'total_income': total_income,
                 'total_expense': total_expense,
                 'balance': balance
-            }
\ No newline at end of file
+            }
+    
+    @staticmethod
+    def get_changes_since(user_id, since=0, limit=None):
+        """Get transactions changed or deleted after a sync watermark.
+        
+        The returned ``watermark`` is the value to pass as ``since`` on the
+        next call; ``has_more`` is set when ``limit`` cut the page short.
+        ``reset`` is set when delete markers newer than ``since`` have been
+        pruned: the client must drop its copy and sync again from 0.
+        """
+        with get_db(readonly=True) as conn:
+            cursor = conn.cursor()
+            
+            if since:
+                cursor.execute('SELECT pruned_seq FROM change_log_state')
+                if since < cursor.fetchone()['pruned_seq']:
+                    return {
+                        'changed': [],
+                        'deleted': [],
+                        'watermark': 0,
+                        'has_more': False,
+                        'reset': True
+                    }
+            
+            query = '''SELECT c.seq, c.transaction_id, c.operation, t.*
+                       FROM transaction_changes c
+                       LEFT JOIN transactions t ON t.id = c.transaction_id
+                       WHERE c.user_id = ? AND c.seq > ?
+                       ORDER BY c.seq'''
+            params = [user_id, since]
+            
+            if limit:
+                query += ' LIMIT ?'
+                params.append(limit + 1)
+            
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            
+            has_more = bool(limit) and len(rows) > limit
+            if has_more:
+                rows = rows[:limit]
+            
+            changed = []
+            deleted = []
+            for row in rows:
+                if row['operation'] == 'delete' or row['id'] is None:
+                    deleted.append(row['transaction_id'])
+                else:
+                    changed.append(Transaction._from_row(row))
+            
+            return {
+                'changed': changed,
+                'deleted': deleted,
+                'watermark': rows[-1]['seq'] if rows else since,
+                'has_more': has_more,
+                'reset': False
+            }
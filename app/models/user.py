@@ -26,7 +26,7 @@ class User(UserMixin):
         """Create a new user."""
         password_hash = generate_password_hash(password)
         
-        with get_db() as conn:
+        with get_db(readonly=False) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 'INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
@@ -38,7 +38,7 @@ class User(UserMixin):
     @staticmethod
     def get_by_id(user_id):
         """Get user by ID."""
-        with get_db() as conn:
+        with get_db(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
             row = cursor.fetchone()
@@ -56,7 +56,7 @@ class User(UserMixin):
     @staticmethod
     def get_by_username(username):
         """Get user by username."""
-        with get_db() as conn:
+        with get_db(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM users WHERE username = ?', (username,))
             row = cursor.fetchone()
@@ -74,7 +74,7 @@ class User(UserMixin):
     @staticmethod
     def get_by_email(email):
         """Get user by email."""
-        with get_db() as conn:
+        with get_db(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
             row = cursor.fetchone()
@@ -0,0 +1,286 @@
+"""JSON API routes for mobile and sync clients."""
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from flask import Blueprint, jsonify, request
+from flask_login import current_user
+from app.forms.transaction_forms import CATEGORIES, MAX_AMOUNT
+from app.models.database import atomic
+from app.models.transaction import Transaction
+from app.config import Config
+
+bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+TRANSACTION_TYPES = ('income', 'expense')
+VALID_CATEGORIES = {value for value, _ in CATEGORIES}
+FIELDS = ('description', 'amount', 'transaction_type', 'category', 'date')
+MAX_SQLITE_INT = 2 ** 63 - 1
+
+class ApiError(Exception):
+    """Error returned to the client as a JSON body."""
+    
+    def __init__(self, message, status=400, errors=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.errors = errors
+
+@bp.errorhandler(ApiError)
+def handle_api_error(error):
+    """Render API errors as JSON."""
+    body = {'error': error.message}
+    if error.errors:
+        body['errors'] = error.errors
+    return jsonify(body), error.status
+
+@bp.before_request
+def require_login():
+    """Reject unauthenticated requests with 401 instead of a redirect."""
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Authentication required'}), 401
+
+def _parse_date(value):
+    """Parse an ISO date string, returning None if invalid."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+def _validate_transaction(payload, partial=False):
+    """Validate a transaction payload and return cleaned field values.
+    
+    With ``partial`` only the fields present in the payload are checked.
+    """
+    if not isinstance(payload, dict):
+        raise ApiError('Transaction data must be a JSON object')
+    
+    cleaned = {}
+    errors = {}
+    
+    for field in FIELDS:
+        if field not in payload:
+            if not partial:
+                errors[field] = 'This field is required.'
+            continue
+        
+        value = payload[field]
+        if field == 'description':
+            if not isinstance(value, str) or not 1 <= len(value.strip()) <= 200:
+                errors[field] = 'Description must be 1 to 200 characters.'
+            else:
+                cleaned[field] = value.strip()
+        elif field == 'amount':
+            try:
+                amount = Decimal(str(value))
+            except (InvalidOperation, ValueError):
+                amount = None
+            if (isinstance(value, bool) or amount is None or not amount.is_finite()
+                    or not Decimal('0.01') <= amount <= MAX_AMOUNT):
+                errors[field] = f'Amount must be between 0.01 and {MAX_AMOUNT}.'
+            elif amount != amount.quantize(Decimal('0.01')):
+                # Reject rather than round so stored amounts are what was sent
+                errors[field] = 'Amount can have at most 2 decimal places.'
+            else:
+                cleaned[field] = amount
+        elif field == 'transaction_type':
+            if not isinstance(value, str) or value not in TRANSACTION_TYPES:
+                errors[field] = 'Type must be income or expense.'
+            else:
+                cleaned[field] = value
+        elif field == 'category':
+            if not isinstance(value, str) or value not in VALID_CATEGORIES:
+                errors[field] = 'Not a valid category.'
+            else:
+                cleaned[field] = value
+        elif field == 'date':
+            parsed = _parse_date(value)
+            if parsed is None:
+                errors[field] = 'Date must be in YYYY-MM-DD format.'
+            else:
+                cleaned[field] = parsed.isoformat()
+    
+    if errors:
+        raise ApiError('Invalid transaction data', errors=errors)
+    
+    return cleaned
+
+def _get_owned_transaction(transaction_id, conn=None):
+    """Get a transaction owned by the current user or raise a 404."""
+    if not 1 <= transaction_id <= MAX_SQLITE_INT:
+        raise ApiError('Transaction not found', status=404)
+    
+    transaction = Transaction.get_by_id(transaction_id, conn=conn)
+    
+    if not transaction or transaction.user_id != current_user.id:
+        raise ApiError('Transaction not found', status=404)
+    
+    return transaction
+
+def _create(payload, conn=None):
+    """Create a transaction for the current user from a JSON payload."""
+    data = _validate_transaction(payload)
+    return Transaction.create(user_id=current_user.id, conn=conn, **data)
+
+def _update(transaction_id, payload, partial=False, conn=None):
+    """Update a transaction owned by the current user."""
+    transaction = _get_owned_transaction(transaction_id, conn=conn)
+    data = _validate_transaction(payload, partial=partial)
+    
+    values = {field: getattr(transaction, field) for field in FIELDS}
+    values.update(data)
+    transaction.update(conn=conn, **values)
+    return transaction
+
+def _delete(transaction_id, conn=None):
+    """Delete a transaction owned by the current user."""
+    transaction = _get_owned_transaction(transaction_id, conn=conn)
+    transaction.delete(conn=conn)
+
+def _get_json():
+    """Get the request body as JSON or raise an API error."""
+    payload = request.get_json(silent=True)
+    if payload is None:
+        raise ApiError('Request body must be valid JSON')
+    return payload
+
+def _get_filters():
+    """Read category and date range filters from the query string."""
+    filters = {}
+    
+    category = request.args.get('category', '')
+    if category:
+        filters['category'] = category
+    
+    for name in ('start_date', 'end_date'):
+        value = request.args.get(name, '')
+        if value:
+            if _parse_date(value) is None:
+                raise ApiError(f'{name} must be in YYYY-MM-DD format')
+            filters[name] = value
+    
+    return filters
+
+def _apply_operation(operation, conn):
+    """Apply one batch operation and return its result."""
+    if not isinstance(operation, dict):
+        raise ApiError('Operation must be a JSON object')
+    
+    op = operation.get('op')
+    transaction_id = operation.get('id')
+    
+    if op in ('update', 'delete') and (isinstance(transaction_id, bool)
+                                       or not isinstance(transaction_id, int)):
+        raise ApiError('id must be an integer')
+    
+    if op == 'create':
+        transaction = _create(operation.get('data'), conn=conn)
+        return {'op': op, 'transaction': transaction.to_dict()}
+    if op == 'update':
+        transaction = _update(transaction_id, operation.get('data'),
+                              partial=True, conn=conn)
+        return {'op': op, 'transaction': transaction.to_dict()}
+    if op == 'delete':
+        _delete(transaction_id, conn=conn)
+        return {'op': op, 'id': transaction_id}
+    
+    raise ApiError('op must be one of create, update, delete')
+
+@bp.route('/transactions', methods=['GET'])
+def list_transactions():
+    """List transactions with optional filtering and pagination."""
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = request.args.get('per_page', Config.TRANSACTIONS_PER_PAGE, type=int)
+    per_page = min(max(per_page, 1), Config.API_MAX_PER_PAGE)
+    if (page - 1) * per_page > MAX_SQLITE_INT:
+        raise ApiError('page is out of range')
+    filters = _get_filters()
+    
+    total = Transaction.count_by_user(current_user.id, **filters)
+    transactions = Transaction.get_by_user(
+        current_user.id,
+        limit=per_page,
+        offset=(page - 1) * per_page,
+        order_by='date DESC, created_at DESC',
+        **filters
+    )
+    
+    return jsonify({
+        'transactions': [t.to_dict() for t in transactions],
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'total_pages': (total + per_page - 1) // per_page
+    })
+
+@bp.route('/transactions/<int:transaction_id>', methods=['GET'])
+def get_transaction(transaction_id):
+    """Get a single transaction."""
+    return jsonify(_get_owned_transaction(transaction_id).to_dict())
+
+@bp.route('/transactions', methods=['POST'])
+def create_transaction():
+    """Create a transaction."""
+    transaction = _create(_get_json())
+    return jsonify(transaction.to_dict()), 201
+
+@bp.route('/transactions/<int:transaction_id>', methods=['PUT', 'PATCH'])
+def update_transaction(transaction_id):
+    """Replace (PUT) or partially update (PATCH) a transaction."""
+    transaction = _update(
+        transaction_id,
+        _get_json(),
+        partial=request.method == 'PATCH'
+    )
+    return jsonify(transaction.to_dict())
+
+@bp.route('/transactions/<int:transaction_id>', methods=['DELETE'])
+def delete_transaction(transaction_id):
+    """Delete a transaction."""
+    _delete(transaction_id)
+    return '', 204
+
+@bp.route('/summary', methods=['GET'])
+def summary():
+    """Get income, expense, and balance totals."""
+    return jsonify(Transaction.get_summary(current_user.id))
+
+@bp.route('/sync', methods=['GET'])
+def sync():
+    """Get transactions changed or deleted since a client watermark.
+    
+    Clients start with ``since=0`` and pass back the returned watermark.
+    """
+    since = min(max(request.args.get('since', 0, type=int), 0), MAX_SQLITE_INT)
+    changes = Transaction.get_changes_since(
+        current_user.id, since=since, limit=Config.API_SYNC_LIMIT
+    )
+    changes['changed'] = [t.to_dict() for t in changes['changed']]
+    return jsonify(changes)
+
+@bp.route('/batch', methods=['POST'])
+def batch():
+    """Apply many create/update/delete operations atomically.
+    
+    The body is ``{"operations": [{"op": "create", "data": {...}},
+    {"op": "update", "id": 1, "data": {...}}, {"op": "delete", "id": 2}]}``.
+    If any operation fails nothing is written and the error names its index.
+    """
+    payload = _get_json()
+    operations = payload.get('operations') if isinstance(payload, dict) else None
+    
+    if not isinstance(operations, list) or not operations:
+        raise ApiError('operations must be a non-empty list')
+    if len(operations) > Config.API_BATCH_MAX_OPERATIONS:
+        raise ApiError(
+            f'A batch may contain at most {Config.API_BATCH_MAX_OPERATIONS} operations'
+        )
+    
+    results = []
+    with atomic() as conn:
+        for index, operation in enumerate(operations):
+            try:
+                results.append(_apply_operation(operation, conn))
+            except ApiError as error:
+                error.message = f'Operation {index}: {error.message}'
+                raise
+    
+    return jsonify({'results': results})
@@ -1,14 +1,36 @@
 """Error handlers."""
-from flask import Blueprint, render_template
+from flask import Blueprint, jsonify, render_template, request
+from werkzeug.exceptions import HTTPException
 
 bp = Blueprint('errors', __name__)
 
+def _is_api_request():
+    """Check whether the request targets the JSON API."""
+    return request.path.startswith('/api/')
+
+@bp.app_errorhandler(HTTPException)
+def http_error(error):
+    """Handle other HTTP errors, as JSON for API requests."""
+    if _is_api_request():
+        response = jsonify({'error': error.description})
+        response.status_code = error.code
+        # Keep headers such as Allow on 405 responses
+        for key, value in error.get_headers():
+            if key.lower() != 'content-type':
+                response.headers[key] = value
+        return response
+    return error
+
 @bp.app_errorhandler(404)
 def not_found_error(error):
     """Handle 404 errors."""
+    if _is_api_request():
+        return jsonify({'error': 'Not found'}), 404
     return render_template('errors/404.html'), 404
 
 @bp.app_errorhandler(500)
 def internal_error(error):
     """Handle 500 errors."""
+    if _is_api_request():
+        return jsonify({'error': 'Internal server error'}), 500
     return render_template('errors/500.html'), 500
\ No newline at end of file
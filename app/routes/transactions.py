@@ -86,7 +86,7 @@ def add_transaction():
         Transaction.create(
             user_id=current_user.id,
             description=form.description.data,
-            amount=float(form.amount.data),
+            amount=form.amount.data,
             transaction_type=form.transaction_type.data,
             category=form.category.data,
             date=form.date.data
@@ -110,7 +110,7 @@ def edit_transaction(transaction_id):
     if form.validate_on_submit():
         transaction.update(
             description=form.description.data,
-            amount=float(form.amount.data),
+            amount=form.amount.data,
             transaction_type=form.transaction_type.data,
             category=form.category.data,
             date=form.date.data
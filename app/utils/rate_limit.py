@@ -0,0 +1,260 @@
+"""In-process rate limiting and load shedding."""
+import hmac
+import threading
+import time
+from collections import Counter
+from flask import abort, current_app, g, jsonify, request
+from flask_login import current_user
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600}
+
+def parse_limit(limit):
+    """Parse a limit such as ``'10/minute'`` into ``(capacity, refill_rate)``."""
+    count, _, period = limit.partition('/')
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period.strip()]
+
+def parse_request_start(value):
+    """Parse an ``X-Request-Start`` header into a Unix timestamp.
+    
+    Accepts ``t=<seconds>`` as set by nginx's ``$msec`` as well as bare
+    seconds, milliseconds or microseconds. Returns None if unparseable.
+    """
+    if not value:
+        return None
+    try:
+        started = float(value.strip().removeprefix('t='))
+    except ValueError:
+        return None
+    if started > 1e14:
+        return started / 1e6
+    if started > 1e11:
+        return started / 1e3
+    return started
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` tokens per second."""
+    
+    def __init__(self, capacity, rate):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+    
+    def refill(self, now):
+        """Add the tokens earned since the last update."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def consume(self, now):
+        """Take one token, returning False if the bucket is empty."""
+        self.refill(now)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+    
+    def retry_after(self):
+        """Seconds until the next token is available."""
+        return max(1, int((1 - self.tokens) / self.rate) + 1)
+
+class RateLimitState:
+    """Buckets, counters and load figures for one application."""
+    
+    def __init__(self, limits):
+        self.limits = limits
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.in_flight = 0
+        self.latency = 0.0
+        self.last_log = None
+        self.unlogged = 0
+        self.limited = Counter()
+        self.shed = Counter()
+
+class RateLimiter:
+    """Per-user/per-IP rate limits and adaptive load shedding.
+    
+    Limits come from ``RATE_LIMITS``, keyed by endpoint (``'auth.login'``)
+    or blueprint (``'api'``), optionally prefixed with an HTTP method
+    (``'POST auth.login'``). Logged-in users get a bucket per account;
+    anonymous requests share one per client IP.
+    
+    Endpoints listed in ``LOAD_SHED_ENDPOINTS`` are rejected with 503 while
+    the server is overloaded: when a request waited in the proxy queue for
+    longer than ``LOAD_SHED_QUEUE_THRESHOLD`` (needs ``X-Request-Start``),
+    when the moving average of queue plus handling time passes
+    ``LOAD_SHED_LATENCY_THRESHOLD``, or when ``LOAD_SHED_MAX_IN_FLIGHT``
+    requests are running in this process. The in-flight limit only has an
+    effect with threaded workers; a sync worker handles one at a time.
+    
+    State is kept per application in ``app.extensions['rate_limiter']``.
+    Rejections are logged at most once per ``RATE_LIMIT_LOG_INTERVAL``
+    seconds, and the counters are served as JSON at ``RATE_LIMIT_STATS_URL``
+    to requests bearing ``RATE_LIMIT_STATS_TOKEN``.
+    """
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Register request hooks on the application."""
+        limits = {
+            key: parse_limit(value)
+            for key, value in app.config.get('RATE_LIMITS', {}).items()
+        }
+        app.extensions['rate_limiter'] = RateLimitState(limits)
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        
+        stats_url = app.config.get('RATE_LIMIT_STATS_URL')
+        if stats_url and app.config.get('RATE_LIMIT_STATS_TOKEN'):
+            app.add_url_rule(stats_url, 'rate_limit_stats', self._stats_view)
+    
+    @staticmethod
+    def _state():
+        """Get the rate limit state of the current application."""
+        return current_app.extensions['rate_limiter']
+    
+    def stats(self):
+        """Return limited/shed counters and current load figures."""
+        state = self._state()
+        with state.lock:
+            return {
+                'limited': dict(state.limited),
+                'shed': dict(state.shed),
+                'in_flight': state.in_flight,
+                'latency': round(state.latency, 4)
+            }
+    
+    def _stats_view(self):
+        """Serve ``stats()`` as JSON to requests with the stats token."""
+        token = current_app.config['RATE_LIMIT_STATS_TOKEN']
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            abort(404)
+        return jsonify(self.stats())
+    
+    def _match(self, keys):
+        """Return the most specific rule in ``keys`` matching the request.
+        
+        Method-prefixed endpoint rules win over plain endpoint rules, which
+        win over blueprint rules.
+        """
+        for name in (request.endpoint, request.blueprint):
+            if not name:
+                continue
+            for key in (f'{request.method} {name}', name):
+                if key in keys:
+                    return key
+        return None
+    
+    def _client_key(self):
+        """Identify the caller by user ID when logged in, else by IP."""
+        if current_user.is_authenticated:
+            return f'user:{current_user.id}'
+        return f'ip:{request.remote_addr}'
+    
+    def _queue_time(self):
+        """Seconds the request waited before reaching the app, if known."""
+        started = parse_request_start(request.headers.get('X-Request-Start'))
+        if started is None:
+            return 0.0
+        return max(0.0, time.time() - started)
+    
+    def _before_request(self):
+        """Apply the rate limit, then shed load if the server is overloaded."""
+        if not current_app.config.get('RATE_LIMIT_ENABLED', True):
+            return None
+        if request.endpoint in ('static', 'rate_limit_stats'):
+            return None
+        
+        state = self._state()
+        config = current_app.config
+        now = time.monotonic()
+        
+        rule = self._match(state.limits)
+        if rule:
+            key = (rule, self._client_key())
+            with state.lock:
+                bucket = state.buckets.get(key)
+                if bucket is None:
+                    self._prune(state, now)
+                    bucket = state.buckets[key] = TokenBucket(*state.limits[rule])
+                allowed = bucket.consume(now)
+                if not allowed:
+                    state.limited[rule] += 1
+            if not allowed:
+                return self._reject(429, 'Too many requests', bucket.retry_after())
+        
+        queued = self._queue_time()
+        shed_rule = self._match(config.get('LOAD_SHED_ENDPOINTS', ()))
+        with state.lock:
+            slow = state.latency >= config['LOAD_SHED_LATENCY_THRESHOLD']
+            overloaded = shed_rule and (
+                state.in_flight >= config['LOAD_SHED_MAX_IN_FLIGHT']
+                or queued >= config['LOAD_SHED_QUEUE_THRESHOLD']
+                or slow
+            )
+            if overloaded:
+                state.shed[shed_rule] += 1
+                if slow:
+                    # Count the shed request as a fast sample so the average
+                    # recovers even when only shed endpoints receive traffic
+                    state.latency *= 1 - config['LOAD_SHED_LATENCY_ALPHA']
+            else:
+                state.in_flight += 1
+                g.rate_limit_started = now - queued
+        if overloaded:
+            return self._reject(503, 'Server is busy, please retry shortly', 1)
+        return None
+    
+    def _teardown_request(self, exc):
+        """Record request latency and release the in-flight slot."""
+        started = g.pop('rate_limit_started', None)
+        if started is None:
+            return
+        elapsed = time.monotonic() - started
+        alpha = current_app.config['LOAD_SHED_LATENCY_ALPHA']
+        state = self._state()
+        with state.lock:
+            state.in_flight -= 1
+            state.latency += alpha * (elapsed - state.latency)
+    
+    def _prune(self, state, now):
+        """Drop idle buckets that have refilled, bounding memory use."""
+        if len(state.buckets) < current_app.config['RATE_LIMIT_MAX_BUCKETS']:
+            return
+        for key, bucket in list(state.buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.capacity:
+                del state.buckets[key]
+    
+    def _log_rejections(self):
+        """Log rejection counters, at most once per log interval."""
+        state = self._state()
+        now = time.monotonic()
+        with state.lock:
+            state.unlogged += 1
+            interval = current_app.config['RATE_LIMIT_LOG_INTERVAL']
+            if state.last_log is not None and now - state.last_log < interval:
+                return
+            state.last_log = now
+            count, state.unlogged = state.unlogged, 0
+            limited, shed = dict(state.limited), dict(state.shed)
+        current_app.logger.warning(
+            '%s requests rejected since last report (limited=%s, shed=%s)',
+            count, limited, shed
+        )
+    
+    def _reject(self, status, message, retry_after):
+        """Build a fast rejection response without rendering templates."""
+        self._log_rejections()
+        if request.blueprint == 'api':
+            response = jsonify({'error': message})
+        else:
+            response = current_app.response_class(message, mimetype='text/plain')
+        response.status_code = status
+        response.headers['Retry-After'] = str(retry_after)
+        return response